@@ -0,0 +1,265 @@
+from collections import deque
+from typing import Optional
+import asyncio
+import logging
+import os
+
+from .webrtc_handler import create_peer_connection, exchange_ice_candidates, parse_ice_servers, receive_answer, \
+    send_offer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BUFFER_SIZE = 1024 * 1024
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_RESUME_TIMEOUT = 5.0
+DEFAULT_RESUME_ATTEMPTS = 3
+DEFAULT_RESUME_BACKOFF = 0.5
+
+
+def gen_connection_id() -> int:
+    """
+    Generates a random NetherNet connection ID.
+
+    Returns:
+        int: A random unsigned 64-bit connection ID.
+    """
+    return int.from_bytes(os.urandom(8), "big")
+
+
+class ResumableSession:
+    """
+    A NetherNet peer connection that can be resumed after it drops.
+
+    The signaling WebSocket, the ICE servers it handed out and the connection ID are kept
+    for the lifetime of the session, so resuming never requires logging in or connecting to
+    the signaling server again. Data sent while the connection is down is buffered and
+    flushed once it is re-established.
+
+    aiortc cannot restart ICE on an existing peer connection, so resuming replaces the
+    peer connection and re-offers it under the same connection ID. If an offer is abandoned
+    before it is answered, the next offer uses a new connection ID so a late answer can never
+    be mistaken for the current one. aiortc also has no "disconnected" state, so a drop is
+    only detected once ICE has failed.
+
+    If automatic resuming gives up, the last error is stored in resume_error and send()
+    raises it until a later resume() succeeds.
+    """
+
+    def __init__(self,
+                 websocket,
+                 connection_info: str,
+                 max_buffer_size: int = DEFAULT_MAX_BUFFER_SIZE,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 resume_timeout: float = DEFAULT_RESUME_TIMEOUT,
+                 auto_resume: bool = True,
+                 resume_attempts: int = DEFAULT_RESUME_ATTEMPTS,
+                 resume_backoff: float = DEFAULT_RESUME_BACKOFF):
+        """
+        Initializes the session from an already authenticated signaling connection.
+
+        Args:
+            websocket: The signaling WebSocket connection, which must stay open for the session.
+            connection_info (str): The connection info received from the signaling server.
+            max_buffer_size (int): The maximum number of bytes to buffer while disconnected.
+            connect_timeout (float): The number of seconds to wait for the initial connection.
+            resume_timeout (float): The number of seconds to wait for a resume attempt.
+            auto_resume (bool): Whether to resume automatically when the connection drops.
+            resume_attempts (int): The number of automatic resume attempts before giving up.
+            resume_backoff (float): The delay in seconds before the second automatic attempt,
+                doubled for each attempt after that.
+        """
+        self.websocket = websocket
+        self.ice_servers = parse_ice_servers(connection_info)
+        self.connection_id = gen_connection_id()
+        self.max_buffer_size = max_buffer_size
+        self.connect_timeout = connect_timeout
+        self.resume_timeout = resume_timeout
+        self.auto_resume = auto_resume
+        self.resume_attempts = resume_attempts
+        self.resume_backoff = resume_backoff
+        self.resume_error: Optional[ConnectionError] = None
+        self.peer_connection = None
+        self.data_channel = None
+        self.buffer_size = 0
+        self._buffer: deque[bytes | str] = deque()
+        self._connected = asyncio.Event()
+        self._offer_lock = asyncio.Lock()
+        self._offer_abandoned = False
+        self._candidate_task: Optional[asyncio.Task] = None
+        self._resume_task: Optional[asyncio.Task] = None
+
+    async def connect(self) -> None:
+        """
+        Opens the peer connection and waits until it is established.
+
+        Raises:
+            asyncio.TimeoutError: If the connection is not established within connect_timeout.
+        """
+        async with self._offer_lock:
+            await asyncio.wait_for(self._reoffer(), self.connect_timeout)
+
+    async def resume(self) -> None:
+        """
+        Re-establishes a dropped peer connection with a new offer under the same connection ID,
+        or under a new one if the previous offer was abandoned before it was answered.
+
+        Concurrent calls, including the automatic resume, are serialized; a call made while
+        the connection is already up does nothing.
+
+        Raises:
+            ConnectionError: If the connection is not re-established within resume_timeout.
+        """
+        async with self._offer_lock:
+            if self._is_connected():
+                return
+
+            self._connected.clear()
+            try:
+                await asyncio.wait_for(self._reoffer(), self.resume_timeout)
+            except Exception as e:
+                raise ConnectionError(f"Failed to resume connection {self.connection_id}") from e
+            self.resume_error = None
+            logger.info("Resumed connection %d", self.connection_id)
+
+    def send(self, data: bytes | str) -> None:
+        """
+        Sends data on the data channel, buffering it while the connection is down.
+
+        Args:
+            data (bytes | str): The data to send.
+
+        Raises:
+            ConnectionError: If automatic resuming has given up on the connection.
+            BufferError: If buffering the data would exceed the maximum buffer size.
+        """
+        if self.resume_error is not None:
+            raise self.resume_error
+
+        if self._can_send():
+            self.data_channel.send(data)
+            return
+
+        size = len(data.encode("UTF-8")) if isinstance(data, str) else len(data)
+        if self.buffer_size + size > self.max_buffer_size:
+            raise BufferError(f"Send buffer is full ({self.buffer_size} of {self.max_buffer_size} bytes)")
+        self._buffer.append(data)
+        self.buffer_size += size
+
+    def clear_buffer(self) -> None:
+        """
+        Discards any data buffered while the connection was down.
+        """
+        self._buffer.clear()
+        self.buffer_size = 0
+
+    async def close(self) -> None:
+        """
+        Closes the peer connection and discards buffered data. The signaling WebSocket is left
+        open for the caller to close.
+        """
+        self.auto_resume = False
+        self.clear_buffer()
+        await _cancel_task(self._resume_task)
+        self._resume_task = None
+        await self._stop_candidate_exchange()
+        if self.peer_connection is not None:
+            await self.peer_connection.close()
+
+    async def _reoffer(self) -> None:
+        await self._stop_candidate_exchange()
+        if self.peer_connection is not None:
+            await self.peer_connection.close()
+
+        peer_connection = create_peer_connection(self.ice_servers)
+        self.peer_connection = peer_connection
+        self.data_channel = peer_connection.createDataChannel("chat")
+        self.data_channel.on("open", self._flush_buffer)
+        peer_connection.on("connectionstatechange", lambda: self._on_connection_state_change(peer_connection))
+
+        await self._negotiate(peer_connection)
+        self._start_candidate_exchange()
+        await self._connected.wait()
+
+    async def _negotiate(self, peer_connection) -> None:
+        # A late answer to an abandoned offer would carry the same connection ID as the answer
+        # to this one, and it may never arrive at all, so switch IDs rather than wait for it.
+        if self._offer_abandoned:
+            self.connection_id = gen_connection_id()
+            self._offer_abandoned = False
+
+        await send_offer(peer_connection, self.websocket, self.connection_id)
+        self._offer_abandoned = True
+        answer = await receive_answer(self.websocket, self.connection_id)
+        self._offer_abandoned = False
+
+        await peer_connection.setRemoteDescription(answer)
+
+    def _start_candidate_exchange(self) -> None:
+        self._candidate_task = asyncio.ensure_future(
+            exchange_ice_candidates(self.peer_connection, self.websocket))
+
+    async def _stop_candidate_exchange(self) -> None:
+        # The candidate exchange reads from the WebSocket, so it has to stop before a new offer
+        # is sent or it would consume the answer.
+        await _cancel_task(self._candidate_task)
+        self._candidate_task = None
+
+    def _on_connection_state_change(self, peer_connection) -> None:
+        if peer_connection is not self.peer_connection:
+            return
+
+        state = peer_connection.connectionState
+        if state == "connected":
+            self._connected.set()
+            self._flush_buffer()
+        elif state == "failed":
+            self._connected.clear()
+            if self.auto_resume and (self._resume_task is None or self._resume_task.done()):
+                self._resume_task = asyncio.ensure_future(self._resume_in_background())
+
+    async def _resume_in_background(self) -> None:
+        attempts = max(self.resume_attempts, 1)
+        for attempt in range(attempts):
+            if attempt:
+                await asyncio.sleep(self.resume_backoff * 2 ** (attempt - 1))
+            try:
+                await self.resume()
+                return
+            except ConnectionError as e:
+                logger.warning("Resume attempt %d of %d failed: %s", attempt + 1, attempts, e)
+                error = e
+
+        logger.error("Giving up on connection %d after %d attempts", self.connection_id, attempts)
+        self.resume_error = error
+
+    def _is_connected(self) -> bool:
+        return (self._connected.is_set()
+                and self.peer_connection is not None
+                and self.peer_connection.connectionState == "connected")
+
+    def _can_send(self) -> bool:
+        return (self._is_connected()
+                and self.data_channel is not None
+                and self.data_channel.readyState == "open")
+
+    def _flush_buffer(self) -> None:
+        while self._buffer and self._can_send():
+            data = self._buffer.popleft()
+            self.buffer_size -= len(data.encode("UTF-8")) if isinstance(data, str) else len(data)
+            self.data_channel.send(data)
+
+
+async def _cancel_task(task: Optional[asyncio.Task]) -> None:
+    """
+    Cancels a task and waits for it to finish without swallowing cancellation of the caller.
+
+    Args:
+        task (asyncio.Task, optional): The task to cancel, or None.
+    """
+    if task is None:
+        return
+    if not task.done():
+        task.cancel()
+        await asyncio.wait({task})
+    if not task.cancelled() and task.exception() is not None:
+        logger.debug("Task failed while being cancelled: %s", task.exception())
@@ -1,7 +1,8 @@
 from typing import Optional
+import json
 import logging
 
-from aiortc import RTCPeerConnection, RTCSessionDescription, RTCIceCandidate
+from aiortc import RTCConfiguration, RTCIceServer, RTCPeerConnection, RTCSessionDescription, RTCIceCandidate
 
 logger = logging.getLogger(__name__)
 
@@ -10,20 +11,101 @@ async def negotiate_webrtc_connection(websocket):
     peer_connection = RTCPeerConnection()
     _ = peer_connection.createDataChannel("chat")
 
+    await send_offer(peer_connection, websocket)
+    answer = await receive_answer(websocket)
+    await peer_connection.setRemoteDescription(answer)
+
+    await exchange_ice_candidates(peer_connection, websocket)
+
+    return peer_connection
+
+
+async def send_offer(peer_connection, websocket, connection_id: Optional[int] = None):
+    """
+    Creates an SDP offer on the peer connection and sends it as a CONNECTREQUEST.
+
+    Args:
+        peer_connection (RTCPeerConnection): The peer connection to create the offer on.
+        websocket: The signaling WebSocket connection.
+        connection_id (int, optional): The NetherNet connection ID to include in the request.
+            Defaults to None, in which case the offer is sent without one.
+    """
     offer = await peer_connection.createOffer()
     await peer_connection.setLocalDescription(offer)
 
-    connect_request = f"CONNECTREQUEST {peer_connection.localDescription.sdp}"
+    if connection_id is None:
+        connect_request = f"CONNECTREQUEST {peer_connection.localDescription.sdp}"
+    else:
+        connect_request = f"CONNECTREQUEST {connection_id} {peer_connection.localDescription.sdp}"
     await websocket.send(connect_request)
 
-    response = await websocket.recv()
-    sdp_answer = response.split(" ", 2)[2]
-    answer = RTCSessionDescription(sdp=sdp_answer, type="answer")
-    await peer_connection.setRemoteDescription(answer)
 
-    await exchange_ice_candidates(peer_connection, websocket)
+async def receive_answer(websocket, connection_id: Optional[int] = None) -> RTCSessionDescription:
+    """
+    Waits for the CONNECTRESPONSE answering an offer.
 
-    return peer_connection
+    Args:
+        websocket: The signaling WebSocket connection.
+        connection_id (int, optional): The NetherNet connection ID the answer must belong to.
+            Defaults to None, in which case the first message received is taken as the answer.
+            Otherwise, messages that are not a CONNECTRESPONSE for this connection are skipped.
+
+    Returns:
+        RTCSessionDescription: The SDP answer.
+    """
+    while True:
+        response = await websocket.recv()
+        if connection_id is None:
+            return RTCSessionDescription(sdp=response.split(" ", 2)[2], type="answer")
+
+        parts = response.split(" ", 2)
+        if len(parts) == 3 and parts[0] == "CONNECTRESPONSE" and parts[1] == str(connection_id):
+            return RTCSessionDescription(sdp=parts[2], type="answer")
+        logger.debug("Ignoring signaling message while waiting for an answer: %s", parts[0])
+
+
+def parse_ice_servers(connection_info: str) -> list[RTCIceServer]:
+    """
+    Extracts the STUN/TURN servers from the signaling server's connection info.
+
+    Args:
+        connection_info (str): The raw connection info message received after connecting.
+
+    Returns:
+        list[RTCIceServer]: The ICE servers, or an empty list if none could be parsed.
+    """
+    try:
+        info = json.loads(connection_info)
+        if isinstance(info.get("Message"), str):
+            info = json.loads(info["Message"])
+        servers = info.get("TurnAuthServers", [])
+    except (ValueError, AttributeError):
+        logger.warning("Could not parse ICE servers from connection info")
+        return []
+
+    return [
+        RTCIceServer(
+            urls=server.get("Urls", []),
+            username=server.get("Username"),
+            credential=server.get("Password")
+        )
+        for server in servers
+    ]
+
+
+def create_peer_connection(ice_servers: Optional[list[RTCIceServer]] = None) -> RTCPeerConnection:
+    """
+    Creates a peer connection configured with the given ICE servers.
+
+    Args:
+        ice_servers (list[RTCIceServer], optional): The STUN/TURN servers to use. Defaults to None.
+
+    Returns:
+        RTCPeerConnection: The new peer connection.
+    """
+    if not ice_servers:
+        return RTCPeerConnection()
+    return RTCPeerConnection(configuration=RTCConfiguration(iceServers=ice_servers))
 
 
 async def handle_ice_candidate(candidate_sdp: str, sdpMid: Optional[str] = None,
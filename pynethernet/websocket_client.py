@@ -1,12 +1,39 @@
 import websockets
 
 
+def get_signaling_url(session_id):
+    return f"wss://signal.franchise.minecraft-services.net/ws/v1.0/signaling/{session_id}"
+
+
+def get_signaling_headers(mctoken):
+    return {"Authorization": f"Bearer {mctoken}", "Content-Type": "application/json"}
+
+
 async def connect_to_xbox_live(session_id, mctoken):
-    url = f"wss://signal.franchise.minecraft-services.net/ws/v1.0/signaling/{session_id}"
-    headers = {"Authorization": f"Bearer {mctoken}", "Content-Type": "application/json"}
+    url = get_signaling_url(session_id)
+    headers = get_signaling_headers(mctoken)
 
     async with websockets.connect(url, extra_headers=headers) as websocket:
         # The server sends back STUN/TURN credentials and other connection information.
         connection_info = await websocket.recv()
         print("Received connection info:", connection_info)
         return websocket, connection_info
+
+
+async def open_signaling_connection(session_id, mctoken):
+    """
+    Connects to the signaling server and leaves the WebSocket open.
+
+    Unlike connect_to_xbox_live, the returned WebSocket is not closed on return, so it can be
+    kept for the lifetime of a ResumableSession. The caller is responsible for closing it.
+
+    Args:
+        session_id (str): The signaling session ID.
+        mctoken (str): The Minecraft services authorization token.
+
+    Returns:
+        tuple: The open WebSocket and the connection info it sent, including STUN/TURN credentials.
+    """
+    websocket = await websockets.connect(get_signaling_url(session_id), extra_headers=get_signaling_headers(mctoken))
+    connection_info = await websocket.recv()
+    return websocket, connection_info
@@ -0,0 +1,226 @@
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock
+
+from pynethernet.session import ResumableSession
+
+
+def make_session(max_buffer_size=16):
+    session = ResumableSession(AsyncMock(), "{}", max_buffer_size=max_buffer_size,
+                               connect_timeout=0.1, resume_timeout=0.1, auto_resume=False)
+    session._start_candidate_exchange = lambda: None
+    return session
+
+
+def mock_peer_connection(mocker, session, state="new"):
+    peer_connection = mocker.Mock()
+    peer_connection.connectionState = state
+    peer_connection.close = AsyncMock()
+    peer_connection.createOffer = AsyncMock()
+    peer_connection.setLocalDescription = AsyncMock()
+    peer_connection.localDescription.sdp = "offer_sdp"
+    peer_connection.createDataChannel.return_value.readyState = "open"
+
+    async def set_remote_description(answer):
+        peer_connection.connectionState = "connected"
+        session._on_connection_state_change(peer_connection)
+
+    peer_connection.setRemoteDescription = AsyncMock(side_effect=set_remote_description)
+    return peer_connection
+
+
+@pytest.mark.asyncio
+async def test_send_buffers_while_disconnected(mocker):
+    session = make_session()
+    session.peer_connection = mock_peer_connection(mocker, session, state="failed")
+    session.data_channel = session.peer_connection.createDataChannel("chat")
+
+    session.send(b"12345678")
+    session.send("abcdefgh")
+
+    session.data_channel.send.assert_not_called()
+    assert session.buffer_size == 16
+
+    with pytest.raises(BufferError):
+        session.send(b"x")
+
+    session.peer_connection.connectionState = "connected"
+    session._on_connection_state_change(session.peer_connection)
+
+    assert session.buffer_size == 0
+    assert [c.args[0] for c in session.data_channel.send.call_args_list] == [b"12345678", "abcdefgh"]
+
+
+@pytest.mark.asyncio
+async def test_resume_reoffers_with_same_connection_id(mocker):
+    session = make_session()
+    old_peer_connection = mock_peer_connection(mocker, session, state="failed")
+    new_peer_connection = mock_peer_connection(mocker, session)
+    session.peer_connection = old_peer_connection
+    session.websocket.recv.return_value = f"CONNECTRESPONSE {session.connection_id} answer_sdp"
+    mocker.patch("pynethernet.session.create_peer_connection", return_value=new_peer_connection)
+
+    await session.resume()
+
+    session.websocket.send.assert_awaited_once_with(f"CONNECTREQUEST {session.connection_id} offer_sdp")
+    old_peer_connection.close.assert_awaited_once()
+    assert new_peer_connection.setRemoteDescription.await_args.args[0].sdp == "answer_sdp"
+    assert session.peer_connection is new_peer_connection
+
+
+@pytest.mark.asyncio
+async def test_resume_ignores_late_answer_to_abandoned_offer(mocker):
+    session = make_session()
+    session.peer_connection = mock_peer_connection(mocker, session, state="failed")
+    messages = asyncio.Queue()
+    session.websocket.recv.side_effect = messages.get
+
+    timed_out_peer_connection = mock_peer_connection(mocker, session)
+    mocker.patch("pynethernet.session.create_peer_connection", return_value=timed_out_peer_connection)
+    with pytest.raises(ConnectionError):
+        await session.resume()
+    abandoned_connection_id = session.connection_id
+
+    # The answer to the timed-out offer arrives late, while the next offer is outstanding.
+    new_peer_connection = mock_peer_connection(mocker, session)
+    mocker.patch("pynethernet.session.create_peer_connection", return_value=new_peer_connection)
+
+    async def answer_offer(message):
+        messages.put_nowait(f"CONNECTRESPONSE {abandoned_connection_id} stale_sdp")
+        messages.put_nowait(f"CONNECTRESPONSE {session.connection_id} fresh_sdp")
+
+    session.websocket.send.side_effect = answer_offer
+    await session.resume()
+
+    assert session.connection_id != abandoned_connection_id
+    timed_out_peer_connection.setRemoteDescription.assert_not_called()
+    assert new_peer_connection.setRemoteDescription.await_args.args[0].sdp == "fresh_sdp"
+    assert messages.empty()
+
+
+@pytest.mark.asyncio
+async def test_resume_after_offer_never_answered(mocker):
+    session = make_session()
+    session.peer_connection = mock_peer_connection(mocker, session, state="failed")
+    messages = asyncio.Queue()
+    session.websocket.recv.side_effect = messages.get
+    mocker.patch("pynethernet.session.create_peer_connection",
+                 side_effect=lambda ice_servers: mock_peer_connection(mocker, session))
+
+    with pytest.raises(ConnectionError):
+        await session.resume()
+
+    async def answer_offer(message):
+        messages.put_nowait(f"CONNECTRESPONSE {session.connection_id} answer_sdp")
+
+    session.websocket.send.side_effect = answer_offer
+    for _ in range(3):
+        await session.resume()
+        assert session.peer_connection.connectionState == "connected"
+        session.peer_connection.connectionState = "failed"
+        session._on_connection_state_change(session.peer_connection)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_resumes_send_one_offer(mocker):
+    session = make_session()
+    session.peer_connection = mock_peer_connection(mocker, session, state="failed")
+    session.websocket.recv.return_value = f"CONNECTRESPONSE {session.connection_id} answer_sdp"
+    mocker.patch("pynethernet.session.create_peer_connection",
+                 side_effect=lambda ice_servers: mock_peer_connection(mocker, session))
+
+    await asyncio.gather(session.resume(), session.resume())
+
+    assert session.websocket.send.await_count == 1
+    assert session.peer_connection.connectionState == "connected"
+
+
+@pytest.mark.asyncio
+async def test_resume_failure(mocker):
+    session = make_session()
+    session.peer_connection = mock_peer_connection(mocker, session, state="failed")
+    session.websocket.recv.side_effect = asyncio.Event().wait
+
+    mocker.patch("pynethernet.session.create_peer_connection", return_value=mock_peer_connection(mocker, session))
+
+    with pytest.raises(ConnectionError):
+        await session.resume()
+
+
+@pytest.mark.asyncio
+async def test_failed_state_resumes_in_background(mocker):
+    session = make_session()
+    session.auto_resume = True
+    old_peer_connection = mock_peer_connection(mocker, session, state="connected")
+    session.peer_connection = old_peer_connection
+    session.data_channel = old_peer_connection.createDataChannel("chat")
+    session._connected.set()
+    session.websocket.recv.return_value = f"CONNECTRESPONSE {session.connection_id} answer_sdp"
+    new_peer_connection = mock_peer_connection(mocker, session)
+    mocker.patch("pynethernet.session.create_peer_connection", return_value=new_peer_connection)
+
+    old_peer_connection.connectionState = "failed"
+    session._on_connection_state_change(old_peer_connection)
+    session.send(b"queued")
+    await session._resume_task
+
+    assert session.peer_connection is new_peer_connection
+    new_peer_connection.createDataChannel.return_value.send.assert_called_once_with(b"queued")
+    assert session.buffer_size == 0
+
+
+@pytest.mark.asyncio
+async def test_background_resume_gives_up(mocker):
+    session = make_session()
+    session.auto_resume = True
+    session.resume_backoff = 0
+    session.peer_connection = mock_peer_connection(mocker, session, state="failed")
+    session.websocket.recv.side_effect = asyncio.Event().wait
+    mock_create = mocker.patch("pynethernet.session.create_peer_connection",
+                               side_effect=lambda ice_servers: mock_peer_connection(mocker, session))
+
+    session._on_connection_state_change(session.peer_connection)
+    await session._resume_task
+
+    assert mock_create.call_count == session.resume_attempts
+    assert isinstance(session.resume_error, ConnectionError)
+    with pytest.raises(ConnectionError):
+        session.send(b"data")
+
+
+@pytest.mark.asyncio
+async def test_close_cancels_resume_and_clears_buffer(mocker):
+    session = make_session()
+    session.auto_resume = True
+    session.peer_connection = mock_peer_connection(mocker, session, state="failed")
+    session.websocket.recv.side_effect = asyncio.Event().wait
+    new_peer_connection = mock_peer_connection(mocker, session)
+    mocker.patch("pynethernet.session.create_peer_connection", return_value=new_peer_connection)
+
+    session.send(b"queued")
+    session._on_connection_state_change(session.peer_connection)
+    await asyncio.sleep(0)
+    await session.close()
+
+    assert session._resume_task is None
+    assert session.buffer_size == 0
+    new_peer_connection.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_stop_candidate_exchange_respects_timeout():
+    session = make_session()
+
+    async def slow_to_cancel():
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            await asyncio.sleep(10)
+
+    session._candidate_task = asyncio.ensure_future(slow_to_cancel())
+    await asyncio.sleep(0)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(session._stop_candidate_exchange(), 0.1)
+    session._candidate_task.cancel()
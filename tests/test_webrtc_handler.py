@@ -1,10 +1,12 @@
 import asyncio
+import json
 
 import pytest
 from unittest.mock import AsyncMock
 from aiortc import RTCIceCandidate
 
-from pynethernet.webrtc_handler import negotiate_webrtc_connection, handle_ice_candidate, exchange_ice_candidates
+from pynethernet.webrtc_handler import negotiate_webrtc_connection, handle_ice_candidate, exchange_ice_candidates, \
+    parse_ice_servers
 
 import pytest
 from unittest.mock import AsyncMock
@@ -114,3 +116,26 @@ async def test_exchange_ice_candidates(mocker):
 
     assert mock_peer_connection.addIceCandidate.await_count == 2
     mock_peer_connection.addIceCandidate.assert_called_with(mock_handle_ice_candidate.return_value)
+
+
+def test_parse_ice_servers():
+    connection_info = json.dumps({
+        "Type": 2,
+        "From": "Server",
+        "Message": json.dumps({
+            "TurnAuthServers": [
+                {"Username": "user", "Password": "pass", "Urls": ["turn:relay.example.com:3478"]}
+            ]
+        })
+    })
+
+    servers = parse_ice_servers(connection_info)
+
+    assert len(servers) == 1
+    assert servers[0].urls == ["turn:relay.example.com:3478"]
+    assert servers[0].username == "user"
+    assert servers[0].credential == "pass"
+
+
+def test_parse_ice_servers_invalid():
+    assert parse_ice_servers("not json") == []
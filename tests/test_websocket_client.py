@@ -1,6 +1,6 @@
 import pytest
 from unittest.mock import AsyncMock, patch
-from pynethernet.websocket_client import connect_to_xbox_live
+from pynethernet.websocket_client import connect_to_xbox_live, open_signaling_connection
 
 
 @pytest.mark.asyncio
@@ -27,3 +27,23 @@ async def test_connect_to_xbox_live(mocker):
 
         assert websocket == await mock_connect().__aenter__()
 
+
+@pytest.mark.asyncio
+async def test_open_signaling_connection():
+    mock_websocket = AsyncMock()
+    mock_websocket.recv.return_value = "mocked STUN/TURN credentials"
+
+    with patch("websockets.connect", new_callable=AsyncMock, return_value=mock_websocket) as mock_connect:
+        websocket, connection_info = await open_signaling_connection("test_session_id", "test_mctoken")
+
+        mock_connect.assert_awaited_once_with(
+            "wss://signal.franchise.minecraft-services.net/ws/v1.0/signaling/test_session_id",
+            extra_headers={
+                "Authorization": "Bearer test_mctoken",
+                "Content-Type": "application/json"
+            }
+        )
+
+        assert websocket is mock_websocket
+        assert connection_info == "mocked STUN/TURN credentials"
+        mock_websocket.close.assert_not_called()